@@ -9,24 +9,48 @@ import sys
 import time
 from pathlib import Path
 
+# Directories never shown in the structure listing (hidden ones are skipped too)
+SKIP_DIRS = frozenset({'node_modules', 'target', 'build', '__pycache__'})
+MAX_TREE_DEPTH = 3
+
+
+def print_tree(path, level=0, max_depth=MAX_TREE_DEPTH):
+    """Print a directory and the first 3 visible files of each subdirectory."""
+    indent = " " * 2 * level
+    print(f"{indent}{os.path.basename(path)}/")
+    files = []
+    dirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                name = entry.name
+                if name[0] == '.':
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in SKIP_DIRS:
+                        dirs.append(entry.path)
+                else:
+                    files.append(name)
+    except OSError:
+        return
+    subindent = " " * 2 * (level + 1)
+    for name in files[:3]:  # Show first 3 files per directory
+        print(f"{subindent}{name}")
+    if len(files) > 3:
+        print(f"{subindent}... and {len(files)-3} more files")
+    # Stop descending once the listing is deep enough to show the layout
+    if level < max_depth:
+        for sub in dirs:
+            print_tree(sub, level + 1, max_depth)
+
+
 def main():
     print("🎉 HTML-to-PDF Converter - Final Demo")
     print("=" * 50)
     
     # Test 1: Show the application structure
     print("📁 Project Structure:")
-    for root, dirs, files in os.walk("."):
-        # Skip hidden and build directories
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', 'target', 'build', '__pycache__']]
-        level = root.replace(".", "").count(os.sep)
-        indent = " " * 2 * level
-        print(f"{indent}{os.path.basename(root)}/")
-        subindent = " " * 2 * (level + 1)
-        for file in files[:3]:  # Show first 3 files per directory
-            if not file.startswith('.'):
-                print(f"{subindent}{file}")
-        if len(files) > 3:
-            print(f"{subindent}... and {len(files)-3} more files")
+    print_tree(".")
     
     print("\n" + "=" * 50)
     
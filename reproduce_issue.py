@@ -5,10 +5,10 @@ from pathlib import Path
 # Add src-backend to path
 sys.path.insert(0, str(Path(__file__).parent / 'src-backend'))
 
-from converter import HTMLToPDFConverter
+import _converter_singleton
 
 def reproduce():
-    converter = HTMLToPDFConverter()
+    converter = _converter_singleton.get()
     
     # Snippet 1: Height 100% on body (potential issue with injected padding)
     html_height_100 = """
@@ -7,21 +7,41 @@ Concurrent-safe:
   converting. This prevents duplicate processing when multiple runs happen at once.
 - On success, the HTML is moved to `done-html/`.
 - If the PDF already exists, conversion is skipped and the HTML is moved to `done-html/`.
+
+Rendering runs in a process pool (one worker per CPU); filesystem moves run on a
+single thread of the main process, overlapped with acquisition and rendering.
 """
 import os
 import shutil
 import errno
+import hashlib
+import importlib.metadata
+import json
+import queue
 import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from tqdm import tqdm
 
 ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = ROOT / 'src-backend'
 
 # Base directory for all working folders. Can be overridden with BASE_DIR env var.
 # Defaults to '/var/www/html' to support system-wide deployments.
 DEFAULT_BASE_DIR = Path(os.getenv('BASE_DIR', '/var/www/html'))
 
+# Content-hash cache (relative to the base directory): maps the hash of an HTML input to
+# the PDF already rendered from it, so unchanged inputs are linked instead of re-rendered.
+# Set DISABLE_HASH_CACHE to always render.
+HASH_CACHE_PATH = Path('.cache') / 'batch_convert_hashes.json'
+
+# Lower-cased suffixes accepted from html-drop/; names are lowered once before matching
+HTML_SUFFIXES = ('.html', '.htm')
+
 # Folder layout computed dynamically from a given base directory
 def _layout(base_dir: Path) -> Tuple[Path, Path, Path, Path]:
     html_dir = base_dir / 'html-drop'
@@ -31,21 +51,99 @@ def _layout(base_dir: Path) -> Tuple[Path, Path, Path, Path]:
     return html_dir, out_dir, processing_dir, done_dir
 
 
-def _atomic_acquire_html(src_html_path: Path, processing_dir: Path, html_dir: Path) -> Optional[Path]:
+def _iter_files(root: Path) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield (path relative to root, DirEntry) for every non-directory entry under root.
+
+    Walks the tree with os.scandir in a single pass per directory; DirEntry type
+    checks come from the directory listing, so no per-file stat is needed.
+    """
+    stack = [(str(root), '')]
+    while stack:
+        path, prefix = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    rel = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, rel + os.sep))
+                    else:
+                        yield rel, entry
+        except OSError:
+            continue
+
+
+def _iter_html_files(html_dir: Path) -> Iterator[str]:
+    """Yield HTML files under html_dir recursively (case-insensitive, .html and .htm).
+
+    Paths are relative to html_dir and come in directory order as they are found.
+    Entries that are not regular files (broken links, sockets, FIFOs) are skipped;
+    for plain files is_file() is answered from the directory listing without a stat.
+    """
+    for rel, entry in _iter_files(html_dir):
+        if entry.name.lower().endswith(HTML_SUFFIXES) and entry.is_file():
+            yield rel
+
+
+def _scan_existing_pdfs(out_dir: Path) -> Set[str]:
+    """Snapshot the PDFs already in pdf-export/ as paths relative to out_dir."""
+    return {rel for rel, _ in _iter_files(out_dir) if rel.endswith('.pdf')}
+
+
+def _open_dir_fds(*dirs: Path) -> Optional[Tuple[int, ...]]:
+    """Open the given directories once so renames can use renameat() with dir fds.
+
+    Returns None on platforms where os.rename does not support dir_fd.
+    """
+    if os.rename not in os.supports_dir_fd:
+        return None
+    fds = []
+    try:
+        for d in dirs:
+            fds.append(os.open(d, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0)))
+    except OSError:
+        _close_dir_fds(tuple(fds))
+        return None
+    return tuple(fds)
+
+
+def _close_dir_fds(fds: Optional[Tuple[int, ...]]) -> None:
+    for fd in fds or ():
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
+def _atomic_acquire_html(
+    relative: str,
+    processing_prefix: str,
+    html_prefix: str,
+    dir_fds: Optional[Tuple[int, int]] = None,
+) -> Optional[str]:
     """
     Try to atomically move an HTML file from html-drop/ to processing/ to acquire it
     for this worker instance. Returns the new processing path on success, or None if
     the file could not be acquired (e.g., another process acquired it first).
     Now preserves folder structure.
+
+    `relative` is the file's path relative to html-drop/, computed once by the scan
+    and reused by every later move; the prefixes are the folder paths with a trailing
+    separator (see _dir_prefix), so paths are built by concatenation. If dir_fds (html-drop fd, processing fd) is
+    given, the rename is issued relative to those open directories so the kernel
+    does not re-resolve the base path.
     """
+    src_html_path = html_prefix + relative
     # Preserve folder structure in processing directory
-    relative_path = src_html_path.relative_to(html_dir)
-    processing_path = processing_dir / relative_path
-    # Ensure parent directories exist in processing
-    processing_path.parent.mkdir(parents=True, exist_ok=True)
+    processing_path = processing_prefix + relative
+    # Ensure parent directories exist in processing (top-level files need none)
+    if os.sep in relative:
+        os.makedirs(os.path.dirname(processing_path), exist_ok=True)
     try:
         # os.rename is atomic on same filesystem
-        os.rename(src_html_path, processing_path)
+        if dir_fds is not None:
+            os.rename(relative, relative, src_dir_fd=dir_fds[0], dst_dir_fd=dir_fds[1])
+        else:
+            os.rename(src_html_path, processing_path)
         return processing_path
     except FileNotFoundError:
         # Another process likely moved it already
@@ -54,11 +152,11 @@ def _atomic_acquire_html(src_html_path: Path, processing_dir: Path, html_dir: Pa
         # Already being processed by another instance
         return None
     except OSError as e:
-        # Cross-device link? Fall back to shutil.move (copy+delete)
+        # Cross-device link? Fall back to an in-kernel copy + delete
         if getattr(e, 'errno', None) in (errno.EXDEV,):
             try:
-                processing_path.parent.mkdir(parents=True, exist_ok=True)
-                shutil.move(str(src_html_path), str(processing_path))
+                os.makedirs(os.path.dirname(processing_path), exist_ok=True)
+                _kernel_move(src_html_path, processing_path)
                 return processing_path
             except Exception:
                 return None
@@ -66,85 +164,279 @@ def _atomic_acquire_html(src_html_path: Path, processing_dir: Path, html_dir: Pa
         return None
 
 
-def _finalize_html_after_success(processing_path: Path, done_dir: Path, processing_dir: Path) -> None:
-    """Move processed HTML from processing/ to done-html/, avoiding duplicates."""
+def _finalize_html_after_success(processing_path: str, relative: str, done_prefix: str) -> None:
+    """Move processed HTML from processing/ to done-html/ without leaving duplicates."""
     # Preserve folder structure in done-html
-    relative_path = processing_path.relative_to(processing_dir)
-    destination = done_dir / relative_path
+    destination = done_prefix + relative
     # Ensure parent directories exist in done-html
-    destination.parent.mkdir(parents=True, exist_ok=True)
+    if os.sep in relative:
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
     try:
-        if destination.exists():
-            # If already archived as done, remove the processing copy
-            processing_path.unlink(missing_ok=True)
-        else:
-            os.rename(processing_path, destination)
+        # One syscall in the common case. On POSIX this replaces an already-archived
+        # copy of the same name; Windows refuses with FileExistsError instead.
+        os.rename(processing_path, destination)
+    except FileExistsError:
+        # Already archived as done: remove the processing copy
+        _unlink_quietly(processing_path)
     except FileNotFoundError:
         # Already moved or removed by someone else
         pass
     except OSError as e:
-        # Cross-device: fall back to shutil.move; otherwise try replace
+        # Cross-device: fall back to an in-kernel copy + delete; otherwise try replace
         if getattr(e, 'errno', None) in (errno.EXDEV,):
             try:
-                shutil.move(str(processing_path), str(destination))
+                _kernel_move(processing_path, destination)
                 return
             except Exception:
-                processing_path.unlink(missing_ok=True)
+                _unlink_quietly(processing_path)
                 return
         try:
             os.replace(processing_path, destination)
         except Exception:
             try:
-                shutil.move(str(processing_path), str(destination))
+                shutil.move(processing_path, destination)
             except Exception:
                 # Last resort: delete processing copy to avoid clogging the queue
-                processing_path.unlink(missing_ok=True)
+                _unlink_quietly(processing_path)
 
 
-def _requeue_html_after_failure(processing_path: Path, html_dir: Path, processing_dir: Path) -> None:
+def _requeue_html_after_failure(processing_path: str, relative: str, html_prefix: str) -> None:
     """On failure, move HTML back to html-drop/ for retry. Avoid overwriting."""
-    if not processing_path.exists():
+    if not os.path.exists(processing_path):
         return
     # Preserve folder structure when moving back to html-drop
-    relative_path = processing_path.relative_to(processing_dir)
-    destination = html_dir / relative_path
+    destination = html_prefix + relative
     # Ensure parent directories exist in html-drop
-    destination.parent.mkdir(parents=True, exist_ok=True)
-    if destination.exists():
+    if os.sep in relative:
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+    if os.path.exists(destination):
         # If original path is taken, append a suffix to the filename for retry later
-        retry_name = destination.stem + "__retry" + destination.suffix
-        destination = destination.with_name(retry_name)
+        root, suffix = os.path.splitext(destination)
+        destination = root + "__retry" + suffix
     try:
         os.rename(processing_path, destination)
     except OSError as e:
         if getattr(e, 'errno', None) in (errno.EXDEV,):
             try:
-                destination.parent.mkdir(parents=True, exist_ok=True)
-                shutil.move(str(processing_path), str(destination))
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                _kernel_move(processing_path, destination)
                 return
             except Exception:
                 return
         # If rename fails, attempt replace, then shutil.move
+        flat_destination = html_prefix + os.path.basename(processing_path)
         try:
-            os.replace(processing_path, html_dir / processing_path.name)
+            os.replace(processing_path, flat_destination)
         except Exception:
             try:
-                shutil.move(str(processing_path), str(html_dir / processing_path.name))
+                shutil.move(processing_path, flat_destination)
             except Exception:
                 # Give up and leave it in processing for manual intervention
                 pass
 
+
+def _kernel_move(src: str, dst: str) -> None:
+    """Move a file across filesystems, copying in the kernel with copy_file_range.
+
+    Falls back to shutil.move where copy_file_range is unavailable or refused for
+    this pair of filesystems (older kernels, differing filesystem types).
+    """
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    if copy_file_range is None:
+        shutil.move(src, dst)
+        return
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        if remaining > 0:
+            # Short copy (source shrank or the kernel stopped early): never unlink src
+            # after an incomplete copy; let shutil.move copy it the ordinary way
+            _unlink_quietly(dst)
+            shutil.move(src, dst)
+            return
+        shutil.copystat(src, dst)
+    except OSError as e:
+        _unlink_quietly(dst)
+        if e.errno in (errno.ENOSYS, errno.EXDEV, errno.EOPNOTSUPP, errno.EINVAL):
+            shutil.move(src, dst)
+            return
+        raise
+    os.unlink(src)
+
+
+# Converter inputs besides the HTML itself that change the rendered PDF
+_RENDER_SETTINGS_ENV = ('HEADER_SPACE_MM', 'FOOTER_SPACE_MM', 'DISABLE_SAFE_HEADER_FOOTER', 'DISABLE_COLLAPSE')
+
+
+def _render_settings_fingerprint() -> bytes:
+    """Hash the settings every render of this run shares, so changing them invalidates the cache.
+
+    Covers the converter environment variables, the converter source and its global
+    stylesheet, and the installed WeasyPrint version.
+    """
+    digest = hashlib.sha256()
+    for name in _RENDER_SETTINGS_ENV:
+        value = os.getenv(name)
+        digest.update(b'-' if value is None else b'=' + value.encode('utf-8', 'surrogateescape'))
+        digest.update(b'\0')
+    for path in (BACKEND_DIR / 'converter.py', BACKEND_DIR / 'assets' / 'global.css'):
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(b'-')
+        digest.update(b'\0')
+    try:
+        digest.update(importlib.metadata.version('weasyprint').encode('ascii', 'replace'))
+    except importlib.metadata.PackageNotFoundError:
+        pass
+    return digest.digest()
+
+
+def _html_digest(settings: bytes, relative: str, html_bytes: bytes) -> str:
+    """Hash an HTML input together with the render settings and its folder, so relative assets resolve the same."""
+    digest = hashlib.sha256(settings)
+    digest.update(os.path.dirname(relative).encode('utf-8', 'surrogateescape'))
+    digest.update(b'\0')
+    digest.update(html_bytes)
+    return digest.hexdigest()
+
+
+def _load_hash_cache(cache_path: Path) -> Dict[str, dict]:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _prune_hash_cache(hash_cache: Dict[str, dict], existing_pdfs: Set[str]) -> Dict[str, dict]:
+    """Keep one entry per PDF that still exists: the most recently written one.
+
+    Entries are (re)inserted as PDFs are rendered, so the last entry seen for a PDF is
+    the digest it was rendered from; older digests can no longer match an mtime.
+    """
+    latest: Dict[str, str] = {}
+    for digest, entry in hash_cache.items():
+        pdf = entry.get('pdf') if isinstance(entry, dict) else None
+        if pdf in existing_pdfs:
+            latest[pdf] = digest
+    return {digest: hash_cache[digest] for digest in latest.values()}
+
+
+def _save_hash_cache(cache_path: Path, hash_cache: Dict[str, dict]) -> None:
+    """Write the cache atomically; concurrent runs simply keep the last writer's view."""
+    temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(hash_cache, f)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        _unlink_quietly(str(temp_path))
+
+
+def _reuse_cached_pdf(entry: dict, out_prefix: str, pdf_key: str) -> bool:
+    """Link a previously rendered PDF to pdf_key. False if the cached PDF changed or vanished.
+
+    The folder for pdf_key must already exist.
+    """
+    cached_path = out_prefix + entry.get('pdf', '')
+    out_path = out_prefix + pdf_key
+    try:
+        if os.stat(cached_path).st_mtime_ns != entry.get('mtime_ns'):
+            return False
+        try:
+            os.link(cached_path, out_path)
+        except FileExistsError:
+            # Another instance produced this PDF meanwhile
+            pass
+        except OSError:
+            # Hard links unsupported here (or across devices): copy instead
+            shutil.copyfile(cached_path, out_path)
+    except OSError:
+        return False
+    return True
+
+
+def _dir_prefix(directory: Path) -> str:
+    """Return directory as a string with a trailing separator, ready for concatenation."""
+    return os.path.join(os.fspath(directory), '')
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+# Image cache shared by the renders of one worker. Pools live for one run (or less, when
+# recycled), so a changed image is picked up by the next run and the cache stays bounded.
+_worker_cache: Optional[dict] = None
+
+
+def _init_worker() -> None:
+    """Pool initializer: build this worker's converter and start its image cache.
+
+    Runs in the worker after the fork, so every worker builds its own process-wide
+    converter (and font configuration) instead of using one inherited from the parent.
+    """
+    global _worker_cache
+    _worker_cache = {}
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    import _converter_singleton
+    _converter_singleton.get()
+
+
+def max_tasks_per_child() -> int:
+    """Renders per worker before it is recycled, from WEASY_MAX_TASKS_PER_CHILD (0 disables)."""
+    try:
+        return max(0, int(os.getenv('WEASY_MAX_TASKS_PER_CHILD', '25')))
+    except ValueError:
+        return 25
+
+
+def _convert_worker(html_bytes: bytes, base_url: str, out_path_str: str, source: str) -> dict:
+    """Convert one acquired HTML document, already read by the main process, in a pool worker."""
+    started = time.perf_counter()
+    # run_batch_convert has already created the output directory
+    import _converter_singleton
+    result = _converter_singleton.get().convert_bytes(
+        html_bytes, out_path_str, base_url=base_url, source=source, create_parents=False, cache=_worker_cache
+    )
+    result['duration'] = time.perf_counter() - started
+    return result
+
+
+def _summarize_conversions(output_sizes: List[int], durations: List[float]) -> dict:
+    """Aggregate output size and render latency over the files converted in this run."""
+    if not durations:
+        return {}
+    ordered = sorted(durations)
+
+    def percentile(pct: float) -> float:
+        return ordered[round(pct / 100 * (len(ordered) - 1))]
+
+    return {
+        "output_bytes": sum(output_sizes),
+        "mean_seconds": round(sum(ordered) / len(ordered), 3),
+        "p50_seconds": round(percentile(50), 3),
+        "p95_seconds": round(percentile(95), 3),
+    }
+
+
 def run_batch_convert(base_dir: Optional[Path | str] = None) -> dict:
     """Run the batch conversion process for the given base directory.
 
     Returns a summary dict with counts.
     """
-    sys.path.insert(0, str(ROOT / 'src-backend'))
-    try:
-        from converter import HTMLToPDFConverter
-    except Exception as e:
-        return {"status": "error", "error": f"Failed to import converter: {e}"}
-
     if base_dir is None:
         base_dir = DEFAULT_BASE_DIR
     else:
@@ -158,19 +450,39 @@ def run_batch_convert(base_dir: Optional[Path | str] = None) -> dict:
     processing_dir.mkdir(parents=True, exist_ok=True)
     done_dir.mkdir(parents=True, exist_ok=True)
 
-    # Gather HTML files recursively (case-insensitive, .html and .htm)
-    patterns = ['*.html', '*.htm', '*.HTML', '*.HTM']
-    html_files = []
-    for pat in patterns:
-        html_files.extend([p for p in html_dir.rglob(pat)])
-    html_files = sorted({p.resolve() for p in html_files})
-    converter = HTMLToPDFConverter()
-    successes = 0
-    failures = 0
-    skipped_existing = 0
+    workers = os.cpu_count() or 1
+
+    # Discovery runs on its own thread and feeds a bounded queue, so conversions start
+    # on the first file found and memory stays O(workers) however full html-drop/ is.
+    # It starts before the (slow) WeasyPrint import below so the two overlap.
+    discovered: queue.Queue = queue.Queue(maxsize=2 * workers)
+
+    def _discover() -> None:
+        try:
+            for relative in _iter_html_files(html_dir):
+                discovered.put(relative)
+        finally:
+            discovered.put(None)
+
+    scan_thread = threading.Thread(target=_discover, name="batch-convert-scan", daemon=True)
+    scan_thread.start()
+
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    try:
+        # Fail fast before spawning workers. Only import here: a converter built in this
+        # process would not be used by the workers, which each build their own
+        import _converter_singleton  # noqa: F401
+    except Exception as e:
+        # Let the scan thread run to completion instead of blocking on a full queue
+        while discovered.get() is not None:
+            pass
+        return {"status": "error", "error": f"Failed to import converter: {e}"}
+
+    first = discovered.get()
     acquired = 0
 
-    if not html_files:
+    if first is None:
         # Helpful debug output when nothing is found
         try:
             listing = ', '.join(sorted([p.name for p in html_dir.iterdir()]))
@@ -187,35 +499,210 @@ def run_batch_convert(base_dir: Optional[Path | str] = None) -> dict:
             "html_drop_listing": listing,
         }
 
-    for src_html_path in tqdm(html_files, desc="Converting HTML files", unit="file"):
-        processing_path = _atomic_acquire_html(src_html_path, processing_dir, html_dir)
-        if processing_path is None:
-            continue
-        acquired += 1
-
-        # Update progress bar with current file name
-        tqdm.write(f"Processing: {src_html_path.relative_to(html_dir)}")
-
-        # Preserve folder structure: calculate relative path from processing_dir and create corresponding output path
-        relative_path = processing_path.relative_to(processing_dir)
-        out_path = out_dir / relative_path.with_suffix('.pdf')
-        if out_path.exists():
-            _finalize_html_after_success(processing_path, done_dir, processing_dir)
-            successes += 1
-            skipped_existing += 1
-            continue
+    def _html_files() -> Iterator[str]:
+        relative = first
+        while relative is not None:
+            yield relative
+            relative = discovered.get()
 
-        try:
-            result = converter.convert_file(str(processing_path), str(out_path))
-            if result.get('status') == 'success':
-                successes += 1
-                _finalize_html_after_success(processing_path, done_dir, processing_dir)
+    # Folder paths as plain strings, computed once; per-file paths are concatenations
+    html_prefix = _dir_prefix(html_dir)
+    out_prefix = _dir_prefix(out_dir)
+    processing_prefix = _dir_prefix(processing_dir)
+    done_prefix = _dir_prefix(done_dir)
+
+    # Pipeline: this thread acquires files and feeds the render pool, while a single
+    # filesystem thread drains finished work and performs the finalize moves.
+    # Archiving therefore overlaps with acquisition and rendering, and all moves out of
+    # processing/ still happen on one thread. Failed files are requeued only after
+    # discovery has finished, so the scan cannot pick them up again in this run.
+    finalize_queue: queue.Queue = queue.Queue()
+    counts = {"successes": 0, "failures": 0, "skipped_existing": 0, "reused_cached": 0}
+    output_sizes: List[int] = []
+    durations: List[float] = []
+    failed: List[Tuple[str, str]] = []
+    progress = tqdm(desc="Converting HTML files", unit="file")
+    # One directory walk up front instead of an exists() stat per file; the
+    # filesystem stage adds each PDF it sees written
+    existing_pdfs = _scan_existing_pdfs(out_dir)
+    # Output folders known to exist, relative to out_dir ('' is out_dir, created above)
+    output_folders: Set[str] = {''}
+    # In-flight conversion (or read failure) of the first source seen this run for each
+    # PDF; the filesystem stage drops an entry once it has settled it
+    pdf_keys_this_run: Dict[str, Future] = {}
+    use_hash_cache = os.getenv('DISABLE_HASH_CACHE') is None
+    hash_cache_path = base_dir / HASH_CACHE_PATH
+    hash_cache = _load_hash_cache(hash_cache_path) if use_hash_cache else {}
+    loaded_hash_cache = dict(hash_cache)
+    render_settings = _render_settings_fingerprint() if use_hash_cache else b''
+
+    def _filesystem_stage() -> None:
+        while True:
+            item = finalize_queue.get()
+            if item is None:
+                return
+            processing_path, relative, pdf_key, digest, future, duplicate = item
+            if future is None:
+                # PDF already exists from an earlier run; just archive the HTML
+                _finalize_html_after_success(processing_path, relative, done_prefix)
+                counts["successes"] += 1
+                counts["skipped_existing"] += 1
+            elif duplicate:
+                # Another source in this run maps to the same PDF (a.html and a.htm) and
+                # `future` is its render: skip like an existing PDF once that succeeded,
+                # otherwise requeue so a later run renders this one
+                try:
+                    rendered = future.result().get('status') == 'success'
+                except Exception:
+                    rendered = False
+                if rendered:
+                    _finalize_html_after_success(processing_path, relative, done_prefix)
+                    counts["successes"] += 1
+                    counts["skipped_existing"] += 1
+                else:
+                    counts["failures"] += 1
+                    failed.append((processing_path, relative))
             else:
-                failures += 1
-                _requeue_html_after_failure(processing_path, html_dir, processing_dir)
-        except Exception:
-            failures += 1
-            _requeue_html_after_failure(processing_path, html_dir, processing_dir)
+                # Update progress bar with current file name
+                tqdm.write(f"Processed: {relative}")
+                try:
+                    result = future.result()
+                except Exception:
+                    result = {}
+                if result.get('status') == 'success':
+                    counts["successes"] += 1
+                    existing_pdfs.add(pdf_key)
+                    if result.get('cached'):
+                        counts["reused_cached"] += 1
+                    else:
+                        output_sizes.append(result.get('output_size', 0))
+                        durations.append(result.get('duration', 0.0))
+                        if use_hash_cache:
+                            try:
+                                mtime_ns = os.stat(out_prefix + pdf_key).st_mtime_ns
+                                # Re-insert so the newest entry for a PDF is also the last one
+                                hash_cache.pop(digest, None)
+                                hash_cache[digest] = {"pdf": pdf_key, "mtime_ns": mtime_ns}
+                            except OSError:
+                                pass
+                    _finalize_html_after_success(processing_path, relative, done_prefix)
+                else:
+                    counts["failures"] += 1
+                    failed.append((processing_path, relative))
+                # Settled: later sources for this PDF now see it in existing_pdfs (or
+                # render it afresh after a failure), so only in-flight renders are kept
+                pdf_keys_this_run.pop(pdf_key, None)
+            progress.update(1)
+
+    fs_thread = threading.Thread(target=_filesystem_stage, name="batch-convert-fs", daemon=True)
+    fs_thread.start()
+    acquire_fds = _open_dir_fds(html_dir, processing_dir)
+    # Inputs are read here, ahead of the pool, so workers never stall on a cold read;
+    # the semaphore caps how many read-but-unrendered documents are held in memory.
+    read_ahead = threading.BoundedSemaphore(2 * workers)
+
+    def _on_done(future: Future, processing_path: str, relative: str, pdf_key: str, digest: str) -> None:
+        read_ahead.release()
+        finalize_queue.put((processing_path, relative, pdf_key, digest, future, False))
+
+    # Workers are recycled (see WEASY_MAX_TASKS_PER_CHILD) by swapping in a fresh pool;
+    # a retired pool finishes the renders already queued on it, then its workers exit.
+    recycle_after = max_tasks_per_child() * workers
+    retired_pools: List[ProcessPoolExecutor] = []
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    submitted = 0
+    try:
+        # One submit per document rather than executor.map(..., chunksize=N): renders take
+        # seconds, so per-task IPC is negligible, and chunking would hold finished PDFs
+        # back from the filesystem stage until their whole chunk is done.
+        for relative in _html_files():
+            processing_path = _atomic_acquire_html(relative, processing_prefix, html_prefix, acquire_fds)
+            if processing_path is None:
+                progress.update(1)
+                continue
+            acquired += 1
+
+            # Preserve folder structure: the output mirrors the HTML's relative path
+            pdf_key = os.path.splitext(relative)[0] + '.pdf'
+            out_path = out_prefix + pdf_key
+            # Look up in-flight renders first: the filesystem stage records a PDF in
+            # existing_pdfs before it forgets the render, so one of the two always sees it
+            earlier = pdf_keys_this_run.get(pdf_key)
+            if earlier is None and pdf_key in existing_pdfs:
+                finalize_queue.put((processing_path, relative, pdf_key, None, None, False))
+                continue
+            if earlier is not None:
+                # Never render two sources into the same PDF at once; this one is settled
+                # by the outcome of the earlier one
+                earlier.add_done_callback(
+                    lambda f, p=processing_path, r=relative, k=pdf_key: finalize_queue.put((p, r, k, None, f, True))
+                )
+                continue
+
+            read_ahead.acquire()
+            digest = None
+            try:
+                # Each output folder is created once per run rather than by every render
+                out_folder = os.path.dirname(pdf_key)
+                if out_folder not in output_folders:
+                    os.makedirs(out_prefix + out_folder, exist_ok=True)
+                    output_folders.add(out_folder)
+                with open(processing_path, 'rb') as html_file:
+                    html_bytes = html_file.read()
+            except OSError as e:
+                future = Future()
+                future.set_exception(e)
+            else:
+                # Hashing takes microseconds; rendering takes seconds
+                digest = _html_digest(render_settings, relative, html_bytes)
+                cached = hash_cache.get(digest) if use_hash_cache else None
+                if cached is not None and _reuse_cached_pdf(cached, out_prefix, pdf_key):
+                    future = Future()
+                    future.set_result({'status': 'success', 'cached': True})
+                else:
+                    if recycle_after and submitted >= recycle_after:
+                        executor.shutdown(wait=False)
+                        retired_pools.append(executor)
+                        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+                        submitted = 0
+                    job = (_convert_worker, html_bytes, os.path.dirname(processing_path), out_path, processing_path)
+                    try:
+                        future = executor.submit(*job)
+                    except BrokenProcessPool:
+                        # A worker died (e.g. OOM-killed) and broke the pool: its pending renders
+                        # fail and are requeued, and this one goes to a fresh pool
+                        retired_pools.append(executor)
+                        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+                        submitted = 0
+                        try:
+                            future = executor.submit(*job)
+                        except Exception as e:
+                            future = Future()
+                            future.set_exception(e)
+                    submitted += 1
+            pdf_keys_this_run[pdf_key] = future
+            future.add_done_callback(
+                lambda f, p=processing_path, r=relative, k=pdf_key, d=digest: _on_done(f, p, r, k, d)
+            )
+    finally:
+        _close_dir_fds(acquire_fds)
+        # Shutting the pools down waits for every future, so all callbacks have queued
+        executor.shutdown(wait=True)
+        for pool in retired_pools:
+            pool.shutdown(wait=True)
+        finalize_queue.put(None)
+        fs_thread.join()
+        progress.close()
+        for processing_path, relative in failed:
+            _requeue_html_after_failure(processing_path, relative, html_prefix)
+        if use_hash_cache:
+            hash_cache = _prune_hash_cache(hash_cache, existing_pdfs)
+            if hash_cache != loaded_hash_cache:
+                _save_hash_cache(hash_cache_path, hash_cache)
+
+    successes = counts["successes"]
+    failures = counts["failures"]
+    skipped_existing = counts["skipped_existing"]
 
     return {
         "status": "ok" if failures == 0 else "partial",
@@ -224,6 +711,8 @@ def run_batch_convert(base_dir: Optional[Path | str] = None) -> dict:
         "successes": successes,
         "failures": failures,
         "skipped_existing": skipped_existing,
+        "reused_cached": counts["reused_cached"],
+        **_summarize_conversions(output_sizes, durations),
     }
 
 def main() -> int:
@@ -5,11 +5,9 @@ Interactive console app for HTML→PDF workflow.
 Options:
 - Convert all HTMLs in html-drop/ to PDFs
 - Sync folders (move HTMLs to done-html/ when PDFs exist)
-- Encrypt PDFs using qpdf shell script
+- Encrypt PDFs (password_protect_pdfs.py, run in-process)
 """
 import os
-import subprocess
-import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -68,24 +66,25 @@ def run_sync(base_dir: Path) -> None:
 
 
 def run_encrypt(dir_path: Path, out_dir: Path | None = None, password: str | None = None) -> int:
-    script = ROOT/"scripts"/"password_protect_pdfs.py"
-    if not script.exists():
-        print("Encryption script not found.")
-        return 2
-    cmd = [sys.executable, str(script), "--dir", str(dir_path)]
+    # Run in-process like convert/sync: no interpreter start-up, and the password
+    # never appears in a child's command line
+    from password_protect_pdfs import main as encrypt_main
+    argv = ["--dir", str(dir_path)]
     if out_dir is not None:
-        cmd += ["--out-dir", str(out_dir)]
+        argv += ["--out-dir", str(out_dir)]
     if password:
-        cmd += ["--password", password]
+        argv += ["--password", password]
     try:
-        subprocess.check_call(cmd)
-        return 0
-    except subprocess.CalledProcessError as e:
-        print(f"Encryption failed with exit code {e.returncode}.")
-        return e.returncode
+        code = encrypt_main(argv)
+    except SystemExit as e:
+        # argparse exits on bad arguments
+        code = e.code if isinstance(e.code, int) else 1
     except Exception as e:
         print(f"Encryption failed: {e}")
         return 1
+    if code:
+        print(f"Encryption failed with exit code {code}.")
+    return code
 
 
 def main() -> int:
@@ -103,7 +102,7 @@ def main() -> int:
         print("\nHTML→PDF Console")
         print("1) Convert HTMLs to PDFs")
         print("2) Sync folders (archive done HTMLs)")
-        print("3) Encrypt PDFs with qpdf")
+        print("3) Encrypt PDFs")
         print("4) Exit")
         try:
             choice = input("Select an option [1-4]: ").strip()
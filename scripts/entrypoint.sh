@@ -10,7 +10,11 @@ mkdir -p "${BASE_DIR:-/app}"/html-drop "${BASE_DIR:-/app}"/pdf-export "${BASE_DI
 mode="${APP_MODE:-cli}"
 case "$mode" in
   api)
-    exec python3 -m uvicorn api_service:app --host 0.0.0.0 --port "${PORT:-8000}" --workers "${WORKERS:-1}"
+    # uvloop/httptools are the C event loop and HTTP parser from requirements.txt. Each of
+    # the WORKERS processes runs its own job pools; concurrent batch runs stay safe because
+    # inputs are claimed by atomic rename into processing/.
+    exec python3 -m uvicorn api_service:app --host 0.0.0.0 --port "${PORT:-8000}" --workers "${WORKERS:-1}" \
+      --loop uvloop --http httptools
     ;;
   batch)
     exec python3 /app/scripts/batch_convert.py
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os
+from functools import lru_cache
 from pathlib import Path
 
 try:
@@ -12,10 +13,17 @@ ROOT = Path(__file__).resolve().parents[1]
 ICON_DIR = ROOT / 'src-tauri' / 'icons'
 ICON_DIR.mkdir(parents=True, exist_ok=True)
 
+MASTER_SIZE = 256
+
+@lru_cache(maxsize=1)
+def _master() -> 'Image.Image':
+    # One flat-colour master shared by every icon; nearest-neighbour scaling is exact for it
+    return Image.new('RGBA', (MASTER_SIZE, MASTER_SIZE), (0, 122, 204, 255))
+
 def ensure_png(name: str, size: int) -> Path:
     path = ICON_DIR / name
     if not path.exists():
-        img = Image.new('RGBA', (size, size), (0, 122, 204, 255))
+        img = _master() if size == MASTER_SIZE else _master().resize((size, size), Image.NEAREST)
         img.save(path, format='PNG')
         print(f"Created {path}")
     return path
@@ -24,8 +32,8 @@ def ensure_ico() -> Path:
     ico_path = ICON_DIR / 'icon.ico'
     if not ico_path.exists():
         sizes = [16, 32, 48, 64, 128, 256]
-        imgs = [Image.new('RGBA', (s, s), (0, 122, 204, 255)) for s in sizes]
-        imgs[0].save(ico_path, format='ICO', sizes=[(s, s) for s in sizes])
+        # PIL scales the master down to each size; it skips sizes larger than the source
+        _master().save(ico_path, format='ICO', sizes=[(s, s) for s in sizes])
         print(f"Created {ico_path}")
     return ico_path
 
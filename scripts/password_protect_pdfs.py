@@ -20,17 +20,25 @@ Options:
   --symbols        Include symbols in password (default: enabled)
   --no-symbols     Disable symbols in password
   --suffix         Temp output suffix used during write (default: .tmp)
+  --workers        Number of parallel workers (default: 4x CPU count, max 32, for threads;
+                   CPU count for processes)
+  --executor       Worker type: thread (default) or process
 """
 
 import argparse
+import errno
+import io
+import mmap
 import os
+import re
 import shutil
 import sys
 import tempfile
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List, Tuple, Dict
+from typing import Iterable, Iterator, List, Literal, Optional, Tuple, Dict
 
 from pypdf import PdfReader, PdfWriter
 
@@ -38,6 +46,12 @@ import secrets
 import string
 
 
+# Inputs below this size are handed to workers in batches so per-task dispatch does not
+# dominate; larger ones go one per task, largest first, so they do not finish last.
+SMALL_PDF_BYTES = 256 * 1024
+SMALL_PDF_BATCH = 32
+
+
 def generate_password(length: int = 20, include_symbols: bool = True) -> str:
     """Generate a strong random password.
 
@@ -52,130 +66,404 @@ def generate_password(length: int = 20, include_symbols: bool = True) -> str:
         symbols = "!@#$%^&*()-_=+[]{}:,.?"
         alphabet_groups.append(symbols)
 
-    # Start with one from each group
-    password_chars = [secrets.choice(group) for group in alphabet_groups]
-    remaining_len = max(0, length - len(password_chars))
+    rng = secrets.SystemRandom()
+    # Start with one from each group, fill the rest from the full alphabet, then shuffle
     full_alphabet = "".join(alphabet_groups)
-    password_chars.extend(secrets.choice(full_alphabet) for _ in range(remaining_len))
-    # Shuffle securely by selecting new random order
-    for i in range(len(password_chars) - 1, 0, -1):
-        j = secrets.randbelow(i + 1)
-        password_chars[i], password_chars[j] = password_chars[j], password_chars[i]
+    password_chars = [rng.choice(group) for group in alphabet_groups]
+    password_chars.extend(rng.choices(full_alphabet, k=max(0, length - len(password_chars))))
+    rng.shuffle(password_chars)
     return "".join(password_chars)
 
 
-def find_pdfs(directory: Path, recursive: bool = False) -> List[Path]:
-    """Find .pdf files in directory.
+def generate_passwords(n: int, length: int = 20, include_symbols: bool = True) -> List[str]:
+    """Generate n independent passwords with the same guarantees as generate_password.
 
-    If recursive is False, scans only the top-level. If True, scans all subfolders.
-    Returns a sorted list of file paths.
+    For batch callers (e.g. per-file passwords). Each password draws from the OS
+    CSPRNG; at a few microseconds per character this stays cheap at batch scale.
     """
-    if recursive:
-        results = [p for p in directory.rglob("*.pdf") if p.is_file()]
-    else:
-        results = [p for p in directory.glob("*.pdf") if p.is_file()]
-    return sorted(results)
+    return [generate_password(length=length, include_symbols=include_symbols) for _ in range(n)]
+
 
+def find_pdfs(directory: Path, recursive: bool = False) -> List[Tuple[Path, int]]:
+    """Find .pdf files in directory, with their sizes for scheduling.
 
-def is_pdf_encrypted(pdf_path: Path) -> bool:
-    reader = PdfReader(str(pdf_path))
-    return bool(getattr(reader, "is_encrypted", False))
+    If recursive is False, scans only the top-level. If True, scans all subfolders
+    (without following folder symlinks). Walks with os.scandir, so type checks come
+    from the directory listing and each file costs at most the one stat for its size.
+    Returns a list of (path, size) sorted by path.
+    """
+    results: List[Tuple[Path, int]] = []
+    stack = [str(directory)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(".pdf") and entry.is_file():
+                        try:
+                            size = entry.stat().st_size
+                        except OSError:
+                            continue
+                        results.append((Path(entry.path), size))
+        except OSError:
+            continue
+    results.sort()
+    return results
 
 
-def encrypt_pdf_to_path(input_pdf: Path, output_pdf: Path, password: str, temp_suffix: str = ".tmp") -> None:
-    """Encrypt a PDF and write to a new path using AES-256 if available, else fallback.
+@contextmanager
+def _mmap_pdf(pdf_path: Path) -> Iterator[mmap.mmap]:
+    """Map a PDF read-only for the duration of the block.
 
-    Writes to a temporary file in the output directory, then atomically moves into place.
+    PdfReader given a path reads the whole file into a BytesIO first; handed the
+    mapping instead, it reads straight from the page cache without that copy.
     """
-    reader = PdfReader(str(input_pdf))
-    writer = PdfWriter()
-    writer.clone_document_from_reader(reader)
-
-    # Try strong AES-256 first; if unavailable, progressively fallback to RC4-128 and legacy APIs
+    with open(pdf_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
     try:
-        writer.encrypt(user_password=password, owner_password=password, algorithm="AES-256")
-    except Exception:
-        try:
-            # Prefer RC4-128 if AES-256 is unavailable or cryptography is missing
-            writer.encrypt(user_password=password, owner_password=password, algorithm="RC4-128")
-        except Exception:
-            try:
-                # Legacy PyPDF2 signature
-                writer.encrypt(user_pwd=password, owner_pwd=password, use_128bit=True)
-            except Exception:
+        yield mm
+    finally:
+        mm.close()
+
+
+_PDF_WHITESPACE = b"\x00\t\n\x0c\r "
+_PDF_DELIMITERS = b"()<>[]{}/%"
+# Rest of an indirect reference ("0 R") after its object number
+_REF_TAIL = re.compile(rb"[\x00\t\n\x0c\r ]+\d+[\x00\t\n\x0c\r ]+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])")
+_STARTXREF = re.compile(rb"startxref[\x00\t\n\x0c\r ]+(\d+)")
+# Header of the object a startxref offset points at when the file uses an xref stream
+_OBJ_HEADER = re.compile(rb"\d+[\x00\t\n\x0c\r ]+\d+[\x00\t\n\x0c\r ]+obj")
+
+
+def _skip_space(data: bytes, i: int) -> int:
+    """Index of the next token in data at or after i, skipping whitespace and comments."""
+    while i < len(data):
+        if data[i] in _PDF_WHITESPACE:
+            i += 1
+        elif data[i] == 0x25:  # %
+            while i < len(data) and data[i] not in b"\r\n":
+                i += 1
+        else:
+            break
+    return i
+
+
+def _end_of_regular(data: bytes, i: int) -> int:
+    while i < len(data) and data[i] not in _PDF_WHITESPACE and data[i] not in _PDF_DELIMITERS:
+        i += 1
+    return i
+
+
+def _skip_value(data: bytes, i: int) -> Optional[int]:
+    """Index just past the PDF object starting at data[i], or None if it is malformed."""
+    if i >= len(data):
+        return None
+    if data.startswith(b"<<", i):
+        parsed = _read_dict(data, i)
+        return None if parsed is None else parsed[1]
+    c = data[i]
+    if c == 0x5B:  # [
+        i += 1
+        while True:
+            i = _skip_space(data, i)
+            if i >= len(data):
+                return None
+            if data[i] == 0x5D:  # ]
+                return i + 1
+            i = _skip_value(data, i)
+            if i is None:
+                return None
+    if c == 0x28:  # ( literal string, with nested parentheses and backslash escapes
+        depth = 0
+        while i < len(data):
+            if data[i] == 0x5C:
+                i += 2
+                continue
+            if data[i] == 0x28:
+                depth += 1
+            elif data[i] == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return None
+    if c == 0x3C:  # < hex string
+        end = data.find(b">", i + 1)
+        return None if end == -1 else end + 1
+    if c == 0x2F:  # /Name
+        return _end_of_regular(data, i + 1)
+    end = _end_of_regular(data, i)
+    if end == i:
+        return None
+    if data[i:end].isdigit():
+        # Object number of an indirect reference such as "12 0 R"
+        ref = _REF_TAIL.match(data, end)
+        if ref:
+            return ref.end()
+    return end
+
+
+def _read_dict(data: bytes, i: int) -> Optional[Tuple[Dict[bytes, bytes], int]]:
+    """Parse the dictionary starting at data[i].
+
+    Returns its entries as raw key name -> raw value bytes, and the index past it.
+    """
+    i = _skip_space(data, i)
+    if not data.startswith(b"<<", i):
+        return None
+    i += 2
+    entries: Dict[bytes, bytes] = {}
+    while True:
+        i = _skip_space(data, i)
+        if i >= len(data):
+            return None
+        if data.startswith(b">>", i):
+            return entries, i + 2
+        if data[i] != 0x2F:
+            return None
+        name_end = _end_of_regular(data, i + 1)
+        name = data[i + 1:name_end]
+        value_start = _skip_space(data, name_end)
+        i = _skip_value(data, value_start)
+        if i is None:
+            return None
+        entries[name] = data[value_start:i]
+
+
+def _quick_is_encrypted(mm: mmap.mmap) -> Optional[bool]:
+    """Tell from the trailer whether a mapped PDF is encrypted, without a full parse.
+
+    Only the dictionary that the last startxref belongs to is trusted: the classic
+    trailer dictionary that ends right before it, or the cross-reference stream
+    dictionary at the offset it gives. Text elsewhere near EOF (e.g. an uncompressed
+    content stream mentioning /Encrypt) is ignored. Returns True if that dictionary
+    has an /Encrypt key, False if it has none, and None when the tail cannot be read
+    this way and a real parse is needed.
+    """
+    if mm[:5] != b"%PDF-":
+        return None
+    tail_start = max(5, len(mm) - 4096)
+    startxref = mm.rfind(b"startxref", tail_start)
+    if startxref == -1:
+        return None
+    trailer = mm.rfind(b"trailer", tail_start, startxref)
+    if trailer != -1:
+        data = mm[trailer + len(b"trailer"):startxref]
+        parsed = _read_dict(data, 0)
+        # The dictionary must be exactly what sits between trailer and startxref
+        if parsed is None or _skip_space(data, parsed[1]) != len(data):
+            return None
+        return b"Encrypt" in parsed[0]
+    xref_offset = _STARTXREF.match(mm, startxref)
+    if xref_offset is None:
+        return None
+    offset = int(xref_offset.group(1))
+    if offset >= startxref:
+        return None
+    # An xref stream dictionary lists every key before its stream; 4 KiB is plenty
+    data = mm[offset:min(startxref, offset + 4096)]
+    header = _OBJ_HEADER.match(data)
+    if header is None:
+        return None
+    parsed = _read_dict(data, header.end())
+    if parsed is None or parsed[0].get(b"Type") != b"/XRef":
+        return None
+    return b"Encrypt" in parsed[0]
+
+
+def _fast_copy(src: Path, dst: Path) -> None:
+    """Copy src to dst in the kernel where possible, then copy mode and times like copy2.
+
+    Tries copy_file_range (reflinks on btrfs/XFS), then a sendfile loop, and falls
+    back to shutil.copyfile (which uses fcopyfile on macOS) when both are refused.
+    """
+    with open(src, "rb") as fsrc:
+        size = os.fstat(fsrc.fileno()).st_size
+        with open(dst, "wb") as fdst:
+            in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+            copied = 0
+            for name in ("copy_file_range", "sendfile"):
+                kernel_copy = getattr(os, name, None)
+                if kernel_copy is None:
+                    continue
                 try:
-                    # Newer API without specifying algorithm (library default)
-                    writer.encrypt(user_password=password, owner_password=password)
-                except Exception:
-                    # Very old API: single-arg
-                    writer.encrypt(password)
-
-    output_pdf.parent.mkdir(parents=True, exist_ok=True)
-    temp_path = output_pdf.with_suffix(output_pdf.suffix + temp_suffix)
-    with open(temp_path, "wb") as tmp_f:
+                    while copied < size:
+                        if name == "sendfile":
+                            sent = kernel_copy(out_fd, in_fd, copied, size - copied)
+                        else:
+                            sent = kernel_copy(in_fd, out_fd, size - copied, copied, copied)
+                        if sent == 0:
+                            break
+                        copied += sent
+                except OSError as e:
+                    if e.errno not in (errno.ENOSYS, errno.EXDEV, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTSOCK):
+                        raise
+                    continue
+                break
+    if copied < size:
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+
+def _write_synced(writer: PdfWriter, temp_path: Path) -> None:
+    """Serialize writer to temp_path through a 1 MiB buffer and sync it to disk once.
+
+    The sync happens before the caller's os.replace, so a crash cannot leave a torn PDF
+    under the final name. Windows is skipped; os.replace ordering is enough there.
+    """
+    with open(temp_path, "wb", buffering=1 << 20) as tmp_f:
         writer.write(tmp_f)
+        if os.name != "nt":
+            tmp_f.flush()
+            # macOS has no fdatasync
+            getattr(os, "fdatasync", os.fsync)(tmp_f.fileno())
+
+
+# Ways to call writer.encrypt, strongest first: AES-256, RC4-128 (when AES is unavailable or
+# cryptography is missing), the legacy PyPDF2 signature, the library default, and the very
+# old single-argument API
+_ENCRYPT_CALLS = (
+    lambda writer, password: writer.encrypt(user_password=password, owner_password=password, algorithm="AES-256"),
+    lambda writer, password: writer.encrypt(user_password=password, owner_password=password, algorithm="RC4-128"),
+    lambda writer, password: writer.encrypt(user_pwd=password, owner_pwd=password, use_128bit=True),
+    lambda writer, password: writer.encrypt(user_password=password, owner_password=password),
+    lambda writer, password: writer.encrypt(password),
+)
+
+# Index into _ENCRYPT_CALLS of the call that worked in this process; what succeeds depends
+# on the installed pypdf/cryptography, so it is resolved once instead of per file
+_encrypt_call_index: Optional[int] = None
+
+
+def _encrypt_writer(writer: PdfWriter, password: str) -> None:
+    """Encrypt writer with the strongest writer.encrypt call this environment supports."""
+    global _encrypt_call_index
+    if _encrypt_call_index is not None:
+        try:
+            _ENCRYPT_CALLS[_encrypt_call_index](writer, password)
+            return
+        except Exception:
+            # Unexpected for this document; walk the whole ladder as before
+            pass
+    last_exc: Optional[Exception] = None
+    for index, encrypt_call in enumerate(_ENCRYPT_CALLS):
+        try:
+            encrypt_call(writer, password)
+        except Exception as exc:
+            last_exc = exc
+            continue
+        _encrypt_call_index = index
+        return
+    raise last_exc
+
+
+def encrypt_or_copy(src: Path, dest: Path, password: str, temp_suffix: str = ".tmp") -> Literal["encrypted", "copied", "skipped"]:
+    """Write an encrypted copy of src to dest in one pass over the source.
+
+    Skips when dest already exists and copies src unchanged when it is already
+    encrypted; otherwise encrypts with the strongest available algorithm, writing
+    to a temporary file next to dest and then moving it into place.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists():
+        return "skipped"
+
+    # Keep the mapping open until the writer has serialized everything it reads from it
+    with _mmap_pdf(src) as mm:
+        # Already-encrypted files are only copied, so avoid parsing them when the tail tells
+        if _quick_is_encrypted(mm):
+            _fast_copy(src, dest)
+            return "copied"
+        reader = PdfReader(mm)
+        if getattr(reader, "is_encrypted", False):
+            _fast_copy(src, dest)
+            return "copied"
+        # Every string and stream gets encrypted, so the whole document is rewritten;
+        # an incremental update cannot add encryption to a PDF.
+        writer = PdfWriter()
+        writer.clone_document_from_reader(reader)
+        _encrypt_writer(writer, password)
+
+        temp_path = dest.with_suffix(dest.suffix + temp_suffix)
+        _write_synced(writer, temp_path)
     try:
-        os.replace(temp_path, output_pdf)
+        os.replace(temp_path, dest)
     except OSError:
         try:
-            if output_pdf.exists():
-                os.remove(output_pdf)
+            if dest.exists():
+                os.remove(dest)
         except OSError:
             pass
-        shutil.move(str(temp_path), str(output_pdf))
+        _fast_copy(temp_path, dest)
+        os.remove(temp_path)
+    return "encrypted"
+
+
+# Run-wide settings, set once per worker by _worker_init rather than sent with every task
+_worker_password: Optional[str] = None
+_worker_temp_suffix = ".tmp"
 
 
-def process_pdf_worker(input_path: str, output_path: str, password: str, temp_suffix: str) -> Tuple[str, Dict[str, int]]:
-    """Worker: process a single PDF.
+def process_pdf_worker(input_path: str, output_path: str) -> Tuple[str, Dict[str, int]]:
+    """Worker: process a single PDF with the password and temp suffix given to _worker_init.
 
     Returns a tuple of (action, metrics) where action in {encrypted, copied, skipped}.
     metrics may include sizes for logging.
     """
     src = Path(input_path)
     dest = Path(output_path)
-    dest.parent.mkdir(parents=True, exist_ok=True)
+    # Errors propagate to the caller, which reports the file as failed
+    action = encrypt_or_copy(src, dest, _worker_password, _worker_temp_suffix)
+    return (action, {"src_size": src.stat().st_size, "dst_size": dest.stat().st_size})
 
-    if dest.exists():
-        return ("skipped", {"src_size": src.stat().st_size, "dst_size": dest.stat().st_size})
 
+def _worker_init(password: str, temp_suffix: str) -> None:
+    """Pool initializer: store the run's settings and pay pypdf's and cryptography's lazy
+    set-up once per worker process.
+
+    The first encrypt in a process loads the OpenSSL backend and pypdf's crypt
+    provider; doing it here on a one-page document keeps that off the first real file.
+    """
+    global _worker_password, _worker_temp_suffix
+    _worker_password = password
+    _worker_temp_suffix = temp_suffix
     try:
-        reader = PdfReader(str(src))
-        if getattr(reader, "is_encrypted", False):
-            shutil.copy2(str(src), str(dest))
-            return ("copied", {"src_size": src.stat().st_size, "dst_size": dest.stat().st_size})
-        # Not encrypted: encrypt to destination
         writer = PdfWriter()
-        writer.clone_document_from_reader(reader)
-        try:
-            writer.encrypt(user_password=password, owner_password=password, algorithm="AES-256")
-        except Exception:
-            try:
-                writer.encrypt(user_password=password, owner_password=password, algorithm="RC4-128")
-            except Exception:
-                try:
-                    writer.encrypt(user_pwd=password, owner_pwd=password, use_128bit=True)
-                except Exception:
-                    try:
-                        writer.encrypt(user_password=password, owner_password=password)
-                    except Exception:
-                        writer.encrypt(password)
+        writer.add_blank_page(width=1, height=1)
+        # Also settles which encrypt call works here before the first real file
+        _encrypt_writer(writer, "")
+        writer.write(io.BytesIO())
+    except Exception:
+        # Warm-up only; the real encrypt path has its own fallbacks
+        pass
 
-        temp_path = dest.with_suffix(dest.suffix + temp_suffix)
-        with open(temp_path, "wb") as tmp_f:
-            writer.write(tmp_f)
+
+def process_pdf_batch(jobs: List[Tuple[str, str]]) -> List[Tuple[str, str, object]]:
+    """Worker: process several (input_path, output_path) jobs in one task.
+
+    Returns (input_path, action, metrics) per job; a job that raised comes back as
+    (input_path, "failed", message) so one bad file does not hide the rest of the batch.
+    """
+    results: List[Tuple[str, str, object]] = []
+    for input_path, output_path in jobs:
         try:
-            os.replace(temp_path, dest)
-        except OSError:
-            try:
-                if dest.exists():
-                    os.remove(dest)
-            except OSError:
-                pass
-            shutil.move(str(temp_path), str(dest))
-        return ("encrypted", {"src_size": src.stat().st_size, "dst_size": dest.stat().st_size})
-    except Exception:
-        # On any error, signal failure to caller by raising to be caught there
-        raise
+            action, metrics = process_pdf_worker(input_path, output_path)
+            results.append((input_path, action, metrics))
+        except Exception as exc:
+            results.append((input_path, "failed", str(exc)))
+    return results
+
+
+def _plan_batches(pdfs: List[Tuple[Path, int]], workers: int) -> List[List[Path]]:
+    """Order (path, size) PDFs largest first (LPT) and group the small ones into batches."""
+    sized = sorted(pdfs, key=lambda item: item[1], reverse=True)
+    large = [[pdf] for pdf, size in sized if size >= SMALL_PDF_BYTES]
+    small = [pdf for pdf, size in sized if size < SMALL_PDF_BYTES]
+    # Keep at least a few batches per worker so small inputs still spread across the pool
+    batch_size = max(1, min(SMALL_PDF_BATCH, len(small) // (workers * 4)))
+    return large + [small[i:i + batch_size] for i in range(0, len(small), batch_size)]
 
 
 def write_password_file(password_file: Path, password: str, input_dir: Path, output_dir: Path, total_files: int) -> None:
@@ -193,7 +481,7 @@ def write_password_file(password_file: Path, password: str, input_dir: Path, out
     password_file.write_text("\n".join(content_lines), encoding="utf-8")
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Password-protect PDFs in a directory with a single random password.")
     parser.add_argument("--dir", dest="directory", default="pdf-export", help="Input directory containing PDFs (default: pdf-export)")
     parser.add_argument("--out-dir", dest="out_dir", default=None, help="Output directory for encrypted PDFs (default: <dir>/encrypted)")
@@ -203,10 +491,13 @@ def main() -> int:
     parser.add_argument("--no-symbols", dest="no_symbols", action="store_true", help="Disable symbols in password")
     parser.add_argument("--suffix", dest="suffix", default=".tmp", help="Temporary suffix to use while encrypting (default: .tmp)")
     parser.add_argument("--recursive", dest="recursive", action="store_true", help="Scan input directory recursively for PDFs")
-    parser.add_argument("--workers", dest="workers", type=int, default=max(1, os.cpu_count() or 1), help="Number of parallel workers (default: CPU count)")
+    # Threads by default: most time is spent in file I/O and in cryptography's C code,
+    # which release the GIL, and threads avoid process start-up (spawn on Windows)
+    parser.add_argument("--workers", dest="workers", type=int, default=None, help="Number of parallel workers (default: 4x CPU count, max 32, for threads; CPU count for processes)")
+    parser.add_argument("--executor", dest="executor", choices=("thread", "process"), default="thread", help="Run workers as threads (default) or processes (for very large, CPU-bound PDFs)")
     parser.add_argument("--password", dest="password", default=None, help="Use a specific password instead of generating one")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     target_dir = Path(args.directory).resolve()
     if not target_dir.exists() or not target_dir.is_dir():
         print(f"ERROR: Directory not found: {target_dir}")
@@ -241,7 +532,6 @@ def main() -> int:
 
     print(f"Found {total} PDF(s) in {target_dir}{' (recursive)' if args.recursive else ''}.", flush=True)
     print(f"Output directory: {out_dir}", flush=True)
-    print(f"Using {min(args.workers, max(1, total))} worker(s).\n", flush=True)
 
     processed = 0
     skipped = 0
@@ -252,43 +542,66 @@ def main() -> int:
         print("No PDFs to process.")
         return 0
 
+    # Outputs left by an earlier run are skipped with one listing of out_dir rather than
+    # by handing each file to a worker only to find its destination already exists
+    with os.scandir(out_dir) as it:
+        existing = {entry.name for entry in it}
+    pending = []
+    for pdf, size in pdfs:
+        if pdf.name in existing:
+            skipped += 1
+            print(f"Skipped (exists in output): {pdf.name}", flush=True)
+        else:
+            pending.append((pdf, size))
+    queued = len(pending)
+    if args.workers is None:
+        # Threads mostly wait on I/O, so oversubscribe; each process is a full interpreter
+        cpus = os.cpu_count() or 1
+        args.workers = cpus if args.executor == "process" else min(32, cpus * 4)
+    workers = min(args.workers, max(1, queued))
+    print(f"Using {workers} worker(s) for {queued} PDF(s).\n", flush=True)
+
     # Parallel processing
     futures = []
-    with ProcessPoolExecutor(max_workers=min(args.workers, max(1, total))) as executor:
-        future_to_pdf = {}
-        for pdf in pdfs:
-            dest = out_dir / pdf.name
-            fut = executor.submit(
-                process_pdf_worker,
-                str(pdf),
-                str(dest),
-                password,
-                args.suffix,
-            )
+    if args.executor == "thread":
+        # Threads share this process, so one warm-up covers all of them
+        _worker_init(password, args.suffix)
+        executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, initargs=(password, args.suffix))
+    with executor:
+        future_to_pdfs = {}
+        for batch in _plan_batches(pending, workers):
+            fut = executor.submit(process_pdf_batch, [(str(pdf), str(out_dir / pdf.name)) for pdf in batch])
             futures.append(fut)
-            future_to_pdf[fut] = pdf
+            future_to_pdfs[fut] = batch
 
         completed = 0
         for future in as_completed(futures):
-            pdf = future_to_pdf[future]
-            completed += 1
+            batch = future_to_pdfs[future]
             try:
-                action, metrics = future.result()
+                results = future.result()
+            except Exception as exc:
+                # The whole task was lost (e.g. a worker process died)
+                results = [(str(pdf), "failed", str(exc)) for pdf in batch]
+            for input_path, action, detail in results:
+                name = Path(input_path).name
+                completed += 1
                 if action == "encrypted":
                     processed += 1
-                    print(f"[{completed}/{total}] Encrypted: {pdf.name}", flush=True)
+                    print(f"[{completed}/{queued}] Encrypted: {name}", flush=True)
                 elif action == "copied":
                     copied += 1
-                    print(f"[{completed}/{total}] Copied (already encrypted): {pdf.name}", flush=True)
+                    print(f"[{completed}/{queued}] Copied (already encrypted): {name}", flush=True)
                 elif action == "skipped":
                     skipped += 1
-                    print(f"[{completed}/{total}] Skipped (exists in output): {pdf.name}", flush=True)
+                    print(f"[{completed}/{queued}] Skipped (exists in output): {name}", flush=True)
+                elif action == "failed":
+                    failed += 1
+                    print(f"[{completed}/{queued}] FAIL: {name} - {detail}", flush=True)
                 else:
                     skipped += 1
-                    print(f"[{completed}/{total}] Skipped: {pdf.name}", flush=True)
-            except Exception as exc:
-                failed += 1
-                print(f"[{completed}/{total}] FAIL: {pdf.name} - {exc}", flush=True)
+                    print(f"[{completed}/{queued}] Skipped: {name}", flush=True)
 
     print("\nSummary:")
     print(f"  Input Directory: {target_dir}")
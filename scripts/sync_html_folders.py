@@ -5,17 +5,43 @@ Sync HTML folders with generated PDFs.
 Rules:
 - If a PDF exists in `pdf-export/` for an HTML of the same stem, move that HTML to `done-html/`.
 - Apply this rule for HTMLs located in `processing/` and `html-drop/`.
-- Avoid duplicate collisions by preferring to keep the existing file in `done-html/`.
+- Never leave the same HTML in two places: a copy already in `done-html/` is replaced
+  (POSIX), or kept and the incoming copy dropped (Windows).
 """
 from __future__ import annotations
 
+import json
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
 
 
 # Base directory; can be overridden with BASE_DIR env var. Docker sets BASE_DIR=/app.
 DEFAULT_BASE_DIR = Path(os.getenv('BASE_DIR', '/var/www/html'))
 
+# Per-folder listing of pdf-export/, relative to the base directory, so unchanged
+# folders are not re-read on the next sync. Set DISABLE_SYNC_INDEX to always rescan.
+SYNC_INDEX_PATH = Path('.cache') / 'sync_pdf_index.json'
+
+# Folders listed concurrently while looking for HTMLs in processing/ and html-drop/
+SCAN_WORKERS = 8
+
+# Folders modified this recently are rescanned next time: on filesystems with coarse
+# timestamps a later change could otherwise land within the same mtime tick.
+_RACY_MTIME_NS = 2_000_000_000
+
 def _layout(base_dir: Path) -> tuple[Path, Path, Path, Path]:
     html_dir = base_dir / 'html-drop'
     out_dir = base_dir / 'pdf-export'
@@ -24,19 +50,55 @@ def _layout(base_dir: Path) -> tuple[Path, Path, Path, Path]:
     return html_dir, out_dir, processing_dir, done_dir
 
 
-def _safe_move_to_done(html_path: Path, done_dir: Path, source_dir: Path) -> None:
-    """Move the given HTML into done-html/ with safe handling of duplicates/errors."""
-    # Preserve folder structure in done-html
-    relative_path = html_path.relative_to(source_dir)
-    destination = done_dir / relative_path
-    # Ensure parent directories exist in done-html
-    destination.parent.mkdir(parents=True, exist_ok=True)
+def _list_dir(path: str, prefix: str, ext: str) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """List one folder: (relative, full path) of files ending in ext, and (path, prefix) of subfolders."""
+    files: list[tuple[str, str]] = []
+    subdirs: list[tuple[str, str]] = []
     try:
-        if destination.exists():
-            # Already archived; remove the source to avoid duplicates
-            html_path.unlink(missing_ok=True)
-        else:
-            os.rename(html_path, destination)
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, prefix + entry.name + os.sep))
+                elif entry.name.endswith(ext) and entry.is_file():
+                    files.append((prefix + entry.name, entry.path))
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def _scan_ext(root: Path, ext: str, recursive: bool = True) -> Iterator[tuple[str, str]]:
+    """Yield (path relative to root, full path) for files under root ending in ext.
+
+    Uses os.scandir, so entry type checks come from the directory listing and plain
+    files and folders cost no extra stat. Recursive scans list up to SCAN_WORKERS
+    folders at once, which hides per-folder round trips on network filesystems;
+    files are yielded as each folder's listing completes, in no particular order.
+    """
+    if not recursive:
+        yield from _list_dir(str(root), '', ext)[0]
+        return
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+        pending = {pool.submit(_list_dir, str(root), '', ext)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                pending.update(pool.submit(_list_dir, path, prefix, ext) for path, prefix in subdirs)
+                yield from files
+
+
+def _safe_move_to_done(html_path: str, destination: str) -> None:
+    """Move the given HTML into done-html/ with safe handling of duplicates/errors.
+
+    The parent folder of destination must already exist (see _move_matches_to_done).
+    """
+    try:
+        # One syscall in the common case. On POSIX this replaces an already-archived
+        # copy of the same name; Windows refuses with FileExistsError instead.
+        os.rename(html_path, destination)
+    except FileExistsError:
+        # Already archived; remove the source to avoid duplicates
+        Path(html_path).unlink(missing_ok=True)
     except FileNotFoundError:
         # Source vanished concurrently; nothing to do
         pass
@@ -45,20 +107,115 @@ def _safe_move_to_done(html_path: Path, done_dir: Path, source_dir: Path) -> Non
         try:
             os.replace(html_path, destination)
         except Exception:
-            html_path.unlink(missing_ok=True)
+            Path(html_path).unlink(missing_ok=True)
+
+
+def _move_matches_to_done(matches: Iterable[tuple[str, str]], done_dir: Path) -> int:
+    """Move matched (relative, full path) HTMLs into done-html/, preserving folder structure.
 
+    matches is consumed as it is produced; each needed subfolder is created once, the
+    first time a file for it comes along.
+    """
+    done_prefix = str(done_dir) + os.sep
+    created: set[str] = set()
+    moved = 0
+    for relative, html_path in matches:
+        if os.sep in relative:
+            parent = os.path.dirname(relative)
+            if parent not in created:
+                os.makedirs(done_prefix + parent, exist_ok=True)
+                created.add(parent)
+        _safe_move_to_done(html_path, done_prefix + relative)
+        moved += 1
+    return moved
 
-def _gather_pdf_paths(out_dir: Path) -> set[Path]:
-    """Gather all PDF file paths relative to out_dir, preserving folder structure."""
-    pdf_paths: set[Path] = set()
-    if not out_dir.exists():
-        return pdf_paths
-    for p in out_dir.rglob('*.pdf'):
-        # Store relative path from out_dir, but with .html extension for comparison
-        relative_path = p.relative_to(out_dir)
-        html_path = relative_path.with_suffix('.html')
-        pdf_paths.add(html_path)
-    return pdf_paths
+
+def _gather_pdf_stems(out_dir: Path, index: dict[str, dict] | None = None) -> set[str]:
+    """Gather all PDF paths relative to out_dir without the extension, preserving folder structure.
+
+    index maps each folder (relative, with trailing separator) to its mtime and the PDF
+    stems and subfolders found there. Folders whose mtime is unchanged are taken from
+    the index without being listed; the index is updated in place to the current tree.
+    """
+    if index is None:
+        index = {}
+    fresh: dict[str, dict] = {}
+    stems: set[str] = set()
+    root_prefix = str(out_dir) + os.sep
+    now_ns = time.time_ns()
+    stack = ['']
+    while stack:
+        relative = stack.pop()
+        path = root_prefix + relative
+        try:
+            # Stat before listing so a change made during the scan is seen next time
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        cached = index.get(relative)
+        if cached is not None and cached.get('mtime_ns') == mtime_ns:
+            pdfs, subdirs = cached['pdfs'], cached['subdirs']
+        else:
+            pdfs, subdirs = [], []
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.name.endswith('.pdf') and entry.is_file():
+                            pdfs.append(entry.name[:-len('.pdf')])
+            except OSError:
+                continue
+        fresh[relative] = {
+            'mtime_ns': mtime_ns if now_ns - mtime_ns > _RACY_MTIME_NS else None,
+            'pdfs': pdfs,
+            'subdirs': subdirs,
+        }
+        stems.update(relative + stem for stem in pdfs)
+        stack.extend(relative + name + os.sep for name in subdirs)
+    index.clear()
+    index.update(fresh)
+    return stems
+
+
+@contextmanager
+def _index_lock(index_path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on the sync index so concurrent syncs do not interleave."""
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(index_path.with_suffix('.lock'), 'a+b') as lock_file:
+        fd = lock_file.fileno()
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def _load_sync_index(index_path: Path) -> dict[str, dict]:
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_sync_index(index_path: Path, index: dict[str, dict]) -> None:
+    temp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temp_path, index_path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
 
 
 def run_sync(base_dir: Path | None = None) -> dict:
@@ -66,32 +223,35 @@ def run_sync(base_dir: Path | None = None) -> dict:
         base_dir = DEFAULT_BASE_DIR
     html_dir, out_dir, processing_dir, done_dir = _layout(base_dir)
 
+    index_path = base_dir / SYNC_INDEX_PATH
+    use_index = os.getenv('DISABLE_SYNC_INDEX') is None
+    if use_index and not out_dir.is_dir():
+        # A new pdf-export/ shares nothing with whatever the index remembers
+        index_path.unlink(missing_ok=True)
+
     # Ensure folder structure exists
     html_dir.mkdir(parents=True, exist_ok=True)
     processing_dir.mkdir(parents=True, exist_ok=True)
     done_dir.mkdir(parents=True, exist_ok=True)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    pdf_paths = _gather_pdf_paths(out_dir)
-
-    moved_processing = 0
-    moved_drop = 0
-
-    # Recursively find HTML files in processing directory
-    for html_path in sorted(processing_dir.rglob('*.html')):
-        # Calculate relative path from processing_dir to compare with PDF paths
-        relative_path = html_path.relative_to(processing_dir)
-        if relative_path in pdf_paths:
-            _safe_move_to_done(html_path, done_dir, processing_dir)
-            moved_processing += 1
-
-    # Recursively find HTML files in html-drop directory
-    for html_path in sorted(html_dir.rglob('*.html')):
-        # Calculate relative path from html_dir to compare with PDF paths
-        relative_path = html_path.relative_to(html_dir)
-        if relative_path in pdf_paths:
-            _safe_move_to_done(html_path, done_dir, html_dir)
-            moved_drop += 1
+    if use_index:
+        with _index_lock(index_path):
+            index = _load_sync_index(index_path)
+            pdf_stems = _gather_pdf_stems(out_dir, index)
+            _save_sync_index(index_path, index)
+    else:
+        pdf_stems = _gather_pdf_stems(out_dir)
+
+    # Recursively find HTML files in processing and html-drop; relative paths compare against PDF stems
+    moved_processing = _move_matches_to_done(
+        ((relative, path) for relative, path in _scan_ext(processing_dir, '.html') if relative[:-len('.html')] in pdf_stems),
+        done_dir,
+    )
+    moved_drop = _move_matches_to_done(
+        ((relative, path) for relative, path in _scan_ext(html_dir, '.html') if relative[:-len('.html')] in pdf_stems),
+        done_dir,
+    )
 
     return {"status": "ok", "base_dir": str(base_dir), "moved_processing": moved_processing, "moved_drop": moved_drop}
 
@@ -0,0 +1,25 @@
+"""
+Process-wide lazy HTMLToPDFConverter instance.
+
+Long-lived processes (console sessions, the API service, pool workers) call get()
+instead of constructing a converter for every batch, so WeasyPrint's font
+configuration and the global CSS are set up once per process. The instance is tied to
+the process that built it: a forked child builds its own on first use rather than
+reusing its parent's font configuration.
+"""
+import os
+from typing import Optional
+
+from converter import HTMLToPDFConverter
+
+_instance: Optional[HTMLToPDFConverter] = None
+_instance_pid: Optional[int] = None
+
+
+def get() -> HTMLToPDFConverter:
+    """Return this process's shared converter, creating it on first use."""
+    global _instance, _instance_pid
+    if _instance is None or _instance_pid != os.getpid():
+        _instance = HTMLToPDFConverter()
+        _instance_pid = os.getpid()
+    return _instance
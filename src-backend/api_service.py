@@ -5,53 +5,173 @@ Endpoints:
 - GET /health: Health check
 - POST /convert: Trigger batch conversion; body: {"base_dir": "/path"} optional
 - POST /sync: Trigger sync of folders; body: {"base_dir": "/path"} optional
+- POST /convert_batch: Convert the given files in parallel; body: {"pairs": [["in.html", "out.pdf"], ...]}
 """
 from __future__ import annotations
 
+import asyncio
 import os
 import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 from fastapi import FastAPI
 from pydantic import BaseModel
 
 
-# Ensure we can import scripts as modules
-SCRIPTS_DIR = Path("/app/scripts")
+# Ensure we can import scripts as modules; resolved from this file so the repo's one
+# scripts/ directory is used both in the image (/app/scripts) and in a local checkout
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
 if str(SCRIPTS_DIR) not in sys.path:
     sys.path.insert(0, str(SCRIPTS_DIR))
 
+# Imported here rather than in the handlers so the first request does not pay for them
+import _converter_singleton  # noqa: E402
+import converter  # noqa: E402
+from batch_convert import max_tasks_per_child, run_batch_convert  # noqa: E402
+from sync_html_folders import run_sync  # noqa: E402
+
 DEFAULT_BASE_DIR = Path(os.getenv("BASE_DIR", "/app"))
+RENDER_WORKERS = os.cpu_count() or 1
 
 
 class ConvertRequest(BaseModel):
     base_dir: Optional[str] = None
 
 
-app = FastAPI(title="HTML to PDF Service", version="1.0.0")
+class ConvertBatchRequest(BaseModel):
+    pairs: list[tuple[str, str]]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Jobs run off the event loop. Threads are enough: run_batch_convert renders in its
+    # own process pool and run_sync is filesystem-bound, so neither holds the GIL for long.
+    app.state.executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="job")
+    # Batch runs get one thread of their own, so concurrent /convert requests queue up
+    # instead of each starting a render pool with one process per CPU
+    app.state.batch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch")
+    # Build WeasyPrint's font configuration and the converter CSS before serving; renders
+    # submitted from the service itself go to a process pool whose workers build their own
+    app.state.converter = _converter_singleton.get()
+    app.state.process_pool = _new_render_pool()
+    app.state.render_submitted = 0
+    try:
+        yield
+    finally:
+        app.state.process_pool.shutdown(wait=True)
+        app.state.batch_executor.shutdown(wait=True)
+        app.state.executor.shutdown(wait=True)
+
+
+app = FastAPI(title="HTML to PDF Service", version="1.0.0", lifespan=lifespan)
+
+
+def _new_render_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=RENDER_WORKERS, initializer=_converter_singleton.get)
+
+
+def _retire_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Swap in a fresh render pool if pool is still the current one.
+
+    The retired pool finishes the renders already queued on it, then its workers exit.
+    """
+    if app.state.process_pool is pool:
+        app.state.process_pool = _new_render_pool()
+        app.state.render_submitted = 0
+    pool.shutdown(wait=False)
+
+
+def _render_pool() -> ProcessPoolExecutor:
+    """Return the pool for the next render.
+
+    Like run_batch_convert, workers are recycled after about WEASY_MAX_TASKS_PER_CHILD
+    renders each, so WeasyPrint's memory growth is returned to the OS.
+    """
+    recycle_after = max_tasks_per_child() * RENDER_WORKERS
+    if recycle_after and app.state.render_submitted >= recycle_after:
+        _retire_render_pool(app.state.process_pool)
+    app.state.render_submitted += 1
+    return app.state.process_pool
+
+
+async def _run_job(func, *args: Any, executor: Optional[ThreadPoolExecutor] = None) -> Any:
+    """Run a blocking job on the job executor; its file I/O never touches the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(executor or app.state.executor, func, *args)
 
 
 @app.get("/health")
-def health() -> dict[str, Any]:
+async def health() -> dict[str, Any]:
     return {"status": "ok"}
 
 
 @app.post("/convert")
-def convert(req: ConvertRequest) -> dict[str, Any]:
-    from batch_convert import run_batch_convert
-
+async def convert(req: ConvertRequest) -> dict[str, Any]:
     base_dir = Path(req.base_dir) if req.base_dir else DEFAULT_BASE_DIR
-    summary = run_batch_convert(base_dir)
+    summary = await _run_job(run_batch_convert, base_dir, executor=app.state.batch_executor)
     return summary
 
 
 @app.post("/sync")
-def sync(req: ConvertRequest) -> dict[str, Any]:
-    from sync_html_folders import run_sync
-
+async def sync(req: ConvertRequest) -> dict[str, Any]:
     base_dir = Path(req.base_dir) if req.base_dir else DEFAULT_BASE_DIR
-    summary = run_sync(base_dir)
+    summary = await _run_job(run_sync, base_dir)
     return summary
 
 
+def _make_output_dirs(pairs: list[tuple[str, str]]) -> None:
+    for output_dir in {os.path.dirname(dest) for _, dest in pairs}:
+        if output_dir:
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+            except OSError:
+                # Reported per file when its conversion fails to open the output
+                pass
+
+
+async def _convert_pair(src: str, dest: str, cache_scope: str) -> dict[str, Any]:
+    """Render one file on the render pool; a lost task becomes an error result."""
+    loop = asyncio.get_running_loop()
+    args = (src, dest, False, cache_scope)
+    pool = _render_pool()
+    try:
+        try:
+            task = loop.run_in_executor(pool, converter.convert_single_file, args)
+        except BrokenProcessPool:
+            # A worker died since the last submit: replace the pool and retry there
+            _retire_render_pool(pool)
+            pool = _render_pool()
+            task = loop.run_in_executor(pool, converter.convert_single_file, args)
+        return await task
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            # This render's worker died (e.g. OOM-killed); later renders get a fresh pool
+            _retire_render_pool(pool)
+        return {
+            "status": "error",
+            "input_file": src,
+            "output_file": dest,
+            "error": str(e),
+            "message": f"Failed to convert {src}: {e}",
+        }
+
+
+@app.post("/convert_batch")
+async def convert_batch(req: ConvertBatchRequest) -> dict[str, Any]:
+    # Output folders are created once here instead of by every conversion
+    await _run_job(_make_output_dirs, req.pairs)
+    # One task per file on the render pool, so up to one file per CPU renders at a time;
+    # the pool outlives requests, so images are cached per request via a scope key
+    cache_scope = uuid.uuid4().hex
+    results = await asyncio.gather(*(_convert_pair(src, dest, cache_scope) for src, dest in req.pairs))
+    failures = sum(1 for result in results if result.get("status") != "success")
+    return {
+        "status": "ok" if failures == 0 else "partial",
+        "successes": len(results) - failures,
+        "failures": failures,
+        "results": results,
+    }
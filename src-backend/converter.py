@@ -8,13 +8,13 @@ import logging
 import warnings
 import sys
 import contextlib
+import secrets
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional
 import weasyprint
 from weasyprint import HTML, CSS
 from weasyprint.text.fonts import FontConfiguration
-from pypdf import PdfReader, PdfWriter
-from pypdf.generic import NameObject, NumberObject
 
 # Configure logging and suppress warnings
 logging.basicConfig(level=logging.ERROR)
@@ -33,13 +33,59 @@ wp_logger.propagate = False
 
 # suppress_stderr removed as it hides critical WeasyPrint rendering messages
 
+# One font configuration per process: fontconfig is queried and @font-face rules are
+# registered once, however many converters are created (e.g. per task in a pool). It is
+# built lazily and never inherited across fork: add_font_face skips a font whose file is
+# already in the configuration's temp folder, so a child sharing its parent's folder would
+# never register fonts another process wrote there and would render with a fallback font.
+_FONT_CONFIG: Optional[FontConfiguration] = None
+_FONT_CONFIG_PID: Optional[int] = None
+
+
+def _process_font_config() -> FontConfiguration:
+    """Return this process's font configuration, creating it on first use after a fork."""
+    global _FONT_CONFIG, _FONT_CONFIG_PID
+    if _FONT_CONFIG is None or _FONT_CONFIG_PID != os.getpid():
+        _FONT_CONFIG = FontConfiguration()
+        _FONT_CONFIG_PID = os.getpid()
+    return _FONT_CONFIG
+
+# validate_html_file reads this much of a file; BOMs of encodings whose text contains NULs
+_SNIFF_BYTES = 4096
+_WIDE_BOMS = (b'\xff\xfe', b'\xfe\xff', b'\x00\x00\xfe\xff')
+
+# Space reserved for fixed-position headers/footers, filled in with HEADER_SPACE_MM/FOOTER_SPACE_MM
+_SAFETY_CSS_TEMPLATE = """
+
+
+
+
+
+"""
+
+
+@lru_cache(maxsize=8)
+def _safety_stylesheet(header_mm: float, footer_mm: float, font_config: FontConfiguration) -> Optional[CSS]:
+    """Parse the safety CSS for the given spacing; None when it adds no rules."""
+    css = _SAFETY_CSS_TEMPLATE % {"header_mm": header_mm, "footer_mm": footer_mm}
+    if not css.strip():
+        return None
+    return CSS(string=css, font_config=font_config)
+
+
+# Read once at import: set DISABLE_COLLAPSE to keep bookmarks open in generated PDFs
+_DISABLE_COLLAPSE = os.getenv('DISABLE_COLLAPSE') is not None
+
 
 class HTMLToPDFConverter:
     """Handles conversion of HTML files to PDF with bookmarks."""
 
     def __init__(self):
         """Initialize the converter with font configuration."""
-        self.font_config = FontConfiguration()
+        # The font config is shared process-wide, so fonts are discovered only once. The
+        # image cache is not kept here: callers pass one scoped to a batch (see cache=), so
+        # a changed image is picked up by the next batch and the cache cannot grow forever
+        self.font_config = _process_font_config()
         # Reserve space so any fixed-position headers/footers in HTML won't cover content
         # Can be tuned via env vars HEADER_SPACE_MM / FOOTER_SPACE_MM, or disabled with DISABLE_SAFE_HEADER_FOOTER
         try:
@@ -57,42 +103,55 @@ class HTMLToPDFConverter:
         self._global_css = None
         if self.global_css_path.exists():
             try:
-                self._global_css = CSS(filename=str(self.global_css_path))
+                # Parsed against the shared font config so any @font-face rules are
+                # registered once and stay valid for every document
+                self._global_css = CSS(filename=str(self.global_css_path), font_config=self.font_config)
                 logger.info(f"Loaded global CSS from {self.global_css_path}")
             except Exception as e:
                 logger.error(f"Failed to load global CSS: {e}")
 
 
-        self._safety_css = (
-            """
+        # Parsed once per (header, footer) spacing and shared by every converter in the process
+        self._safety_stylesheet = None
+        if not self._disable_safe_header_footer:
+            self._safety_stylesheet = _safety_stylesheet(header_space_mm, footer_space_mm, self.font_config)
 
-            
-            
+        # Extra stylesheets for every document, in cascade order: safety rules, then global CSS
+        self._extra_stylesheets = [
+            sheet for sheet in (self._safety_stylesheet, self._global_css) if sheet is not None
+        ]
 
-            
-            """
-            % {"header_mm": header_space_mm, "footer_mm": footer_space_mm}
-        )
-
-    def convert_file(self, input_path: str, output_path: str) -> Dict[str, Any]:
+    def convert_file(
+        self,
+        input_path: str,
+        output_path: str,
+        create_parents: bool = True,
+        cache: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """
         Convert a single HTML file to PDF.
 
         Args:
             input_path: Path to the input HTML file
             output_path: Path for the output PDF file
+            create_parents: Create the output directory if missing; batch callers that
+                create each directory once up front pass False
+            cache: WeasyPrint image cache shared by the documents of one batch
+                (default: none, the document caches its images on its own)
 
         Returns:
             Dictionary with conversion result information
         """
         try:
-            # Validate input file exists
-            if not os.path.exists(input_path):
-                raise FileNotFoundError(f"Input file not found: {input_path}")
+            # Validate input file exists; the same stat gives the size for reporting
+            try:
+                input_size = os.stat(input_path).st_size
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Input file not found: {input_path}") from None
 
             # Create output directory if it doesn't exist
             output_dir = os.path.dirname(output_path)
-            if output_dir:
+            if create_parents and output_dir:
                 os.makedirs(output_dir, exist_ok=True)
 
             # Convert HTML to PDF with WeasyPrint
@@ -102,48 +161,7 @@ class HTMLToPDFConverter:
             # Base_url allows relative assets if they exist relative to the file
             html_doc = HTML(filename=input_path, base_url=os.path.dirname(input_path))
 
-            # Generate PDF with automatic bookmarks from headings
-            # WeasyPrint automatically creates bookmarks from h1-h6 elements
-            extra_stylesheets = []
-            if not self._disable_safe_header_footer:
-                extra_stylesheets.append(CSS(string=self._safety_css))
-            
-            # Add global CSS if it exists
-            if self._global_css:
-                extra_stylesheets.append(self._global_css)
-
-            pdf_bytes = html_doc.write_pdf(
-                font_config=self.font_config,
-                stylesheets=extra_stylesheets
-            )
-
-            # Write PDF to file
-            with open(output_path, 'wb') as pdf_file:
-                pdf_file.write(pdf_bytes)
-
-            # Optionally collapse bookmarks by default (skipped for large PDFs)
-            try:
-                disable = os.getenv('DISABLE_COLLAPSE')
-                max_mb_env = os.getenv('COLLAPSE_MAX_MB', '5')
-                try:
-                    max_mb = float(max_mb_env)
-                except ValueError:
-                    max_mb = 5.0
-                should_collapse = (disable is None)
-                if should_collapse:
-                    out_size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                    if out_size_mb <= max_mb:
-                        self._collapse_pdf_bookmarks_in_place(output_path)
-                    else:
-                        logger.info(
-                            f"Skipping bookmark collapse for large PDF ({out_size_mb:.1f} MB > {max_mb:.1f} MB)"
-                        )
-            except Exception as collapse_err:
-                logger.warning(f"Bookmark collapse skipped: {collapse_err}")
-
-            # Get file sizes for reporting
-            input_size = os.path.getsize(input_path)
-            output_size = os.path.getsize(output_path)
+            output_size = self._write_pdf(html_doc, output_path, cache)
 
             result = {
                 'status': 'success',
@@ -169,66 +187,136 @@ class HTMLToPDFConverter:
                 'message': error_msg
             }
 
-    def _collapse_pdf_bookmarks_in_place(self, pdf_path: str) -> None:
-        """Collapse all bookmarks in the PDF so they are closed by default."""
-        reader = PdfReader(pdf_path)
-        writer = PdfWriter()
-        writer.clone_document_from_reader(reader)
+    def convert_bytes(
+        self,
+        html_bytes: bytes,
+        output_path: str,
+        base_url: Optional[str] = None,
+        source: Optional[str] = None,
+        create_parents: bool = True,
+        cache: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Convert HTML that has already been read into memory to PDF.
 
-        root = writer._root_object
-        outlines_ref = root.get(NameObject('/Outlines'))
-        if outlines_ref is None:
-            # No outlines present; just rewrite and return
-            with open(pdf_path, 'wb') as out_f:
-                writer.write(out_f)
-            return
+        Args:
+            html_bytes: Raw HTML document (encoding is sniffed by WeasyPrint)
+            output_path: Path for the output PDF file
+            base_url: Base used to resolve relative assets, usually the source directory
+            source: Name of the original file, used for reporting only
+            create_parents: Create the output directory if missing
+            cache: WeasyPrint image cache shared by the documents of one batch
+                (default: none, the document caches its images on its own)
+
+        Returns:
+            Dictionary with conversion result information
+        """
+        label = source or 'HTML string'
+        try:
+            # Create output directory if it doesn't exist
+            output_dir = os.path.dirname(output_path)
+            if create_parents and output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            logger.info(f"Converting {label} to {output_path}")
+            html_doc = HTML(string=html_bytes, base_url=base_url)
+            output_size = self._write_pdf(html_doc, output_path, cache)
+
+            result = {
+                'status': 'success',
+                'input_file': source,
+                'output_file': output_path,
+                'input_size': len(html_bytes),
+                'output_size': output_size,
+                'message': f'Successfully converted {os.path.basename(label)}'
+            }
+
+            logger.info(f"Conversion successful: {label} -> {output_path}")
+            return result
+
+        except Exception as e:
+            error_msg = f"Failed to convert {label}: {str(e)}"
+            logger.error(error_msg)
 
-        def count_descendants(item_ref) -> int:
-            total = 0
-            item = item_ref.get_object()
-            child_ref = item.get(NameObject('/First'))
-            while child_ref is not None:
-                total += 1
-                total += count_descendants(child_ref)
-                child_ref = child_ref.get_object().get(NameObject('/Next'))
-            return total
-
-        def collapse_item(item_ref) -> None:
-            item = item_ref.get_object()
-            num_desc = count_descendants(item_ref)
-            if num_desc > 0:
-                item[NameObject('/Count')] = NumberObject(-num_desc)
-                child_ref = item.get(NameObject('/First'))
-                while child_ref is not None:
-                    collapse_item(child_ref)
-                    child_ref = child_ref.get_object().get(NameObject('/Next'))
-
-        first_ref = outlines_ref.get_object().get(NameObject('/First'))
-        while first_ref is not None:
-            collapse_item(first_ref)
-            first_ref = first_ref.get_object().get(NameObject('/Next'))
-
-        with open(pdf_path, 'wb') as out_f:
-            writer.write(out_f)
-
-    def validate_html_file(self, file_path: str) -> bool:
+            return {
+                'status': 'error',
+                'input_file': source,
+                'output_file': output_path,
+                'error': str(e),
+                'message': error_msg
+            }
+
+    def _write_pdf(self, html_doc: HTML, output_path: str, cache: Optional[Dict[str, Any]]) -> int:
+        """Render a loaded HTML document to output_path and return the PDF size in bytes."""
+        # Generate PDF with automatic bookmarks from headings
+        # WeasyPrint automatically creates bookmarks from h1-h6 elements
+        # Bookmarks are collapsed by default while the PDF is assembled
+        finisher = None if _DISABLE_COLLAPSE else _collapse_outlines
+        # Stream the PDF into a hidden temporary file next to output_path and move it into
+        # place once write_pdf returns, so a worker killed mid-render (e.g. by the OOM
+        # killer) never leaves a partial PDF under the final name for later runs to skip
+        temp_path = os.path.join(
+            os.path.dirname(output_path),
+            f".{os.path.basename(output_path)}.{secrets.token_hex(4)}.part",
+        )
+        try:
+            # O_EXCL with mode 0o666 gives the same permissions a plain open() would
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+            with os.fdopen(fd, 'wb') as pdf_file:
+                html_doc.write_pdf(
+                    target=pdf_file,
+                    font_config=self.font_config,
+                    stylesheets=self._extra_stylesheets,
+                    cache=cache,
+                    finisher=finisher,
+                )
+                pdf_size = pdf_file.tell()
+            os.replace(temp_path, output_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        return pdf_size
+
+    def validate_html_file(self, file_path: str, deep_validate: bool = False) -> bool:
         """
         Validate if a file is a valid HTML file.
 
+        By default only the extension and the first few KiB are checked: the file must
+        be readable and look like text. WeasyPrint's parser recovers from malformed
+        markup, so real problems surface during conversion anyway.
+
         Args:
             file_path: Path to the file to validate
+            deep_validate: Also load the document with WeasyPrint (fetches and parses it whole)
 
-        Returns: /home/ruan/Documents/nukleus/Helpers/html-to-pdf/done-html
+        Returns:
             True if file is valid HTML, False otherwise
         """
+        # Check file extension
+        if not file_path.lower().endswith(('.html', '.htm')):
+            return False
+
         try:
-            if not os.path.exists(file_path):
-                return False
+            with open(file_path, 'rb') as html_file:
+                prefix = html_file.read(_SNIFF_BYTES)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"Invalid HTML file {file_path}: {e}")
+            return False
 
-            # Check file extension
-            if not file_path.lower().endswith(('.html', '.htm')):
-                return False
+        # NUL bytes mean binary content, unless a BOM marks the file as UTF-16/32
+        if b'\x00' in prefix and not prefix.startswith(_WIDE_BOMS):
+            logger.warning(f"Invalid HTML file {file_path}: binary content")
+            return False
+
+        if not deep_validate:
+            return True
 
+        try:
             # Try to load with WeasyPrint to validate
             HTML(filename=file_path)
             return True
@@ -238,19 +326,76 @@ class HTMLToPDFConverter:
             return False
 
 
+def _object_number(reference: bytes) -> int:
+    """Object number from a pydyf reference such as b'12 0 R'."""
+    return int(reference.split()[0])
+
+
+def _collapse_outlines(document, pdf) -> None:
+    """write_pdf finisher: close every bookmark before the PDF is serialized.
+
+    WeasyPrint gives an open item a /Count of its visible descendants (all of them
+    in a fully open outline); negating it closes the item with that same count.
+    """
+    try:
+        outlines_ref = pdf.catalog.get('Outlines')
+        if outlines_ref is None:
+            return
+        stack = [pdf.objects[_object_number(outlines_ref)].get('First')]
+        # Each item is looked up exactly once; the guard also stops a /Next or /First cycle
+        seen = set()
+        while stack:
+            item_ref = stack.pop()
+            while item_ref is not None:
+                number = _object_number(item_ref)
+                if number in seen:
+                    break
+                seen.add(number)
+                item = pdf.objects[number]
+                if item.get('Count', 0) > 0:
+                    item['Count'] = -item['Count']
+                if 'First' in item:
+                    stack.append(item['First'])
+                item_ref = item.get('Next')
+    except Exception as collapse_err:
+        # Leave the outline open rather than fail the conversion
+        logger.warning(f"Bookmark collapse skipped: {collapse_err}")
+
+
+# Image cache for the batch whose scope key the worker saw last; replaced when it changes
+_WORKER_CACHE_SCOPE: Optional[str] = None
+_WORKER_CACHE: Dict[str, Any] = {}
+
+
 def convert_single_file(args: tuple) -> Dict[str, Any]:
     """
     Worker function for multiprocessing conversion.
 
+    Renders with the process's shared converter (see _converter_singleton), built on
+    the first call; pass _converter_singleton.get as the pool initializer to build it
+    when the worker starts instead.
+
     Args:
-        args: Tuple containing (input_path, output_path)
+        args: Tuple containing (input_path, output_path), optionally followed by
+            create_parents and a cache scope key; files sent with the same key (e.g. one
+            per request) share an image cache, files sent without one use none
 
     Returns:
         Conversion result dictionary
     """
-    input_path, output_path = args
-    converter = HTMLToPDFConverter()
-    return converter.convert_file(input_path, output_path)
+    # Imported here: _converter_singleton imports this module
+    import _converter_singleton
+
+    global _WORKER_CACHE_SCOPE, _WORKER_CACHE
+    input_path, output_path, create_parents, cache_scope = (tuple(args) + (True, None))[:4]
+    cache = None
+    if cache_scope is not None:
+        if cache_scope != _WORKER_CACHE_SCOPE:
+            _WORKER_CACHE_SCOPE, _WORKER_CACHE = cache_scope, {}
+        cache = _WORKER_CACHE
+    return _converter_singleton.get().convert_file(
+        input_path, output_path, create_parents=create_parents, cache=cache
+    )
 
 
 if __name__ == "__main__":